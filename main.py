@@ -69,7 +69,8 @@ def main():
             for data in sample_data:
                 alert_system.records.update_one(
                     {'year': data['year']},
-                    {'$set': {**data, 'timestamp': datetime.now(), 'data_source': 'sample'}},
+                    {'$set': {**data, 'decade': data['year'] // 10 * 10,
+                              'timestamp': datetime.now(), 'data_source': 'sample'}},
                     upsert=True
                 )
             
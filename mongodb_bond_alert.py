@@ -11,9 +11,10 @@ import json
 import os
 
 class MongoDBBondAlert:
-    def __init__(self, connection_string="mongodb://localhost:27017/"):
-        """Initialize MongoDB connection"""
-        self.client = MongoClient(connection_string)
+    def __init__(self, connection_string="mongodb://localhost:27017/", client=None):
+        """Initialize MongoDB connection (optionally reusing an existing client)"""
+        self._owns_client = client is None
+        self.client = client if client is not None else MongoClient(connection_string)
         self.db = self.client['bond_monitoring']
         self.records = self.db['bond_records']
         self.alerts = self.db['alerts']
@@ -24,6 +25,16 @@ class MongoDBBondAlert:
         self.records.create_index("timestamp")
         self.alerts.create_index("alert_time")
         self.alerts.create_index("year")
+        # sp500_return leads: it is the more selective of the two return ranges
+        self.alerts.create_index([("sp500_return", 1), ("baa_bond_return", 1)])
+    
+    def backfill_decade(self):
+        """One-off migration: store the decade on records imported before it existed"""
+        result = self.records.update_many(
+            {'decade': {'$exists': False}},
+            [{'$set': {'decade': {'$subtract': ['$year', {'$mod': ['$year', 10]}]}}}]
+        )
+        return result.modified_count
         
     def import_from_excel(self, file_path):
         """Import data from Excel file to MongoDB"""
@@ -35,6 +46,7 @@ class MongoDBBondAlert:
             for idx, row in df.iterrows():
                 record = {
                     'year': int(row['Year']),
+                    'decade': int(row['Year']) // 10 * 10,
                     'sp500_return': float(row['S&P 500 (includes dividends)']),
                     'baa_bond_return': self._get_baa_value(row),
                     'us_treasury_return': float(row['US T. Bond']),
@@ -186,8 +198,9 @@ class MongoDBBondAlert:
         print(f"✓ Data exported to {output_file}")
     
     def close(self):
-        """Close database connection"""
-        self.client.close()
+        """Close database connection (shared clients are left open)"""
+        if self._owns_client:
+            self.client.close()
 
 # Demo usage
 if __name__ == "__main__":
@@ -198,6 +211,7 @@ if __name__ == "__main__":
     # Initialize system
     alert_system = MongoDBBondAlert()
     alert_system.setup_indexes()
+    alert_system.backfill_decade()
     
     # Import data (replace with your actual file path)
     excel_file = "../Start Project/Lab Simple Test.xlsx"
@@ -220,7 +234,8 @@ if __name__ == "__main__":
         for data in sample_data:
             alert_system.records.update_one(
                 {'year': data['year']},
-                {'$set': {**data, 'timestamp': datetime.now(), 'data_source': 'sample'}},
+                {'$set': {**data, 'decade': data['year'] // 10 * 10,
+                          'timestamp': datetime.now(), 'data_source': 'sample'}},
                 upsert=True
             )
         
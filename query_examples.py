@@ -3,16 +3,134 @@ MongoDB Query Examples for Bond Alert System
 Demonstrates various query patterns and operations
 """
 
+import bson
 import pymongo
+from bson.raw_bson import RawBSONDocument
+from pymongo import MongoClient
 from mongodb_bond_alert import MongoDBBondAlert
 from datetime import datetime, timedelta
+import io
 import json
+import numpy as np
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# One pooled client per connection string, shared by every engine in the process
+_CLIENTS = {}
+
+def _get_client(connection_string):
+    """Return the cached MongoClient for a connection string, creating it once"""
+    client = _CLIENTS.get(connection_string)
+    if client is None:
+        client = MongoClient(
+            connection_string,
+            maxPoolSize=50,
+            compressors='zstd,zlib'
+        )
+        _CLIENTS[connection_string] = client
+    return client
+
+def _write_lines(lines):
+    """Write a section's formatted rows to stdout in a single call"""
+    text = '\n'.join(lines)
+    if text:
+        sys.stdout.write(text + '\n')
+
+# Projection for the year / S&P return listings
+_YEAR_SP500_FIELDS = {'year': 1, 'sp500_return': 1, '_id': 0}
+
+# Projection for the year / S&P / BAA listings
+_YEAR_RETURNS_FIELDS = {'year': 1, 'sp500_return': 1, 'baa_bond_return': 1, '_id': 0}
+
+def _format_year_returns(docs):
+    """Format 'Year N: x.xx%' rows for a result set in one vectorized pass"""
+    if not docs:
+        return []
+    years = np.fromiter((doc['year'] for doc in docs), dtype=np.int32, count=len(docs))
+    returns = np.fromiter((doc['sp500_return'] for doc in docs), dtype=np.float64, count=len(docs))
+    lines = np.char.add(
+        np.char.add('   Year ', years.astype(str)),
+        np.char.mod(': %.2f%%', returns * 100)
+    )
+    return lines.tolist()
+
+def _prebuilt(stages):
+    """Encode constant pipeline stages to BSON once so each call reuses the bytes"""
+    return [RawBSONDocument(bson.encode(stage)) for stage in stages]
+
+class _SectionOutput:
+    """stdout proxy that sends each worker thread's output to its own buffer"""
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+    
+    def capture(self, section):
+        """Run a query section; return what it printed and the error it raised, if any"""
+        self._local.buffer = io.StringIO()
+        try:
+            section()
+            return self._local.buffer.getvalue(), None
+        except Exception as e:
+            return self._local.buffer.getvalue(), e
+        finally:
+            self._local.buffer = None
+    
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer if buffer is not None else self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
 
 class BondQueryEngine:
     """Advanced query interface for MongoDB bond data"""
     
+    # Decade averages and best/worst years share one $facet scan
+    _FACET_PIPELINE = _prebuilt([
+        {
+            '$facet': {
+                'by_decade': [
+                    {
+                        '$group': {
+                            # Stored decade when present, else derived from the year
+                            '_id': {'$ifNull': ['$decade', {'$subtract': ['$year', {'$mod': ['$year', 10]}]}]},
+                            'avg_sp500': {'$avg': '$sp500_return'},
+                            'avg_baa': {'$avg': '$baa_bond_return'},
+                            'avg_treasury': {'$avg': '$us_treasury_return'},
+                            'count': {'$sum': 1}
+                        }
+                    },
+                    {'$sort': {'_id': 1}}
+                ],
+                'best': [
+                    {'$sort': {'sp500_return': -1}},
+                    {'$limit': 1}
+                ],
+                'worst': [
+                    {'$sort': {'sp500_return': 1}},
+                    {'$limit': 1}
+                ]
+            }
+        }
+    ])
+    
+    _ALERT_FREQ_PIPELINE = _prebuilt([
+        {
+            '$group': {
+                '_id': '$year',
+                'alert_count': {'$sum': 1},
+                'alert_types': {'$addToSet': '$alert_type'}
+            }
+        },
+        {'$sort': {'alert_count': -1}},
+        {'$limit': 5}
+    ])
+    
     def __init__(self, connection_string):
-        self.alert_system = MongoDBBondAlert(connection_string)
+        self._client = _get_client(connection_string)
+        self.alert_system = MongoDBBondAlert(connection_string, client=self._client)
         self.records = self.alert_system.records
         self.alerts = self.alert_system.alerts
     
@@ -24,9 +142,9 @@ class BondQueryEngine:
         
         # 1. Find all records
         print("\n1. 📋 All Bond Records:")
-        all_records = list(self.records.find().limit(5))
-        for record in all_records:
-            print(f"   Year {record['year']}: S&P {record['sp500_return']:.2%}, BAA {record['baa_bond_return']:.2%}")
+        all_records = list(self.records.find({}, _YEAR_RETURNS_FIELDS).limit(5))
+        _write_lines(f"   Year {record['year']}: S&P {record['sp500_return']:.2%}, BAA {record['baa_bond_return']:.2%}"
+                     for record in all_records)
         
         # 2. Find specific year
         print("\n2. 🎯 Specific Year (2022):")
@@ -46,23 +164,23 @@ class BondQueryEngine:
         
         # 1. S&P 500 returns above 20%
         print("\n1. 📈 S&P 500 Returns > 20%:")
-        high_returns = list(self.records.find({'sp500_return': {'$gt': 0.20}}))
-        for record in high_returns:
-            print(f"   Year {record['year']}: {record['sp500_return']:.2%}")
+        high_returns = list(self.records.find(
+            {'sp500_return': {'$gt': 0.20}}, _YEAR_SP500_FIELDS
+        ))
+        _write_lines(_format_year_returns(high_returns))
         
         # 2. Negative returns (loss years)
         print("\n2. 📉 Negative Return Years:")
-        negative_years = list(self.records.find({'sp500_return': {'$lt': 0}}))
-        for record in negative_years:
-            print(f"   Year {record['year']}: S&P {record['sp500_return']:.2%}, BAA {record['baa_bond_return']:.2%}")
+        negative_years = list(self.records.find({'sp500_return': {'$lt': 0}}, _YEAR_RETURNS_FIELDS))
+        _write_lines(f"   Year {record['year']}: S&P {record['sp500_return']:.2%}, BAA {record['baa_bond_return']:.2%}"
+                     for record in negative_years)
         
         # 3. Range query (returns between 5% and 15%)
         print("\n3. 🎯 Moderate Returns (5%-15%):")
-        moderate_returns = list(self.records.find({
-            'sp500_return': {'$gte': 0.05, '$lte': 0.15}
-        }))
-        for record in moderate_returns:
-            print(f"   Year {record['year']}: {record['sp500_return']:.2%}")
+        moderate_returns = list(self.records.find(
+            {'sp500_return': {'$gte': 0.05, '$lte': 0.15}}, _YEAR_SP500_FIELDS
+        ))
+        _write_lines(_format_year_returns(moderate_returns))
     
     def logical_queries(self):
         """Logical operators (AND, OR, NOT)"""
@@ -77,9 +195,9 @@ class BondQueryEngine:
                 {'sp500_return': {'$gt': 0.25}},
                 {'baa_bond_return': {'$gt': 0.10}}
             ]
-        }))
-        for record in high_any:
-            print(f"   Year {record['year']}: S&P {record['sp500_return']:.2%}, BAA {record['baa_bond_return']:.2%}")
+        }, _YEAR_RETURNS_FIELDS))
+        _write_lines(f"   Year {record['year']}: S&P {record['sp500_return']:.2%}, BAA {record['baa_bond_return']:.2%}"
+                     for record in high_any)
         
         # 2. AND query - positive returns for both
         print("\n2. ✅ Positive Returns (Both > 0):")
@@ -88,9 +206,9 @@ class BondQueryEngine:
                 {'sp500_return': {'$gt': 0}},
                 {'baa_bond_return': {'$gt': 0}}
             ]
-        }))
-        for record in positive_both:
-            print(f"   Year {record['year']}: S&P {record['sp500_return']:.2%}, BAA {record['baa_bond_return']:.2%}")
+        }, _YEAR_RETURNS_FIELDS))
+        _write_lines(f"   Year {record['year']}: S&P {record['sp500_return']:.2%}, BAA {record['baa_bond_return']:.2%}"
+                     for record in positive_both)
         
         # 3. NOR query - neither S&P nor BAA above 15%
         print("\n3. 🚫 Low Returns (Neither > 15%):")
@@ -99,9 +217,9 @@ class BondQueryEngine:
                 {'sp500_return': {'$gt': 0.15}},
                 {'baa_bond_return': {'$gt': 0.15}}
             ]
-        }))
-        for record in low_returns:
-            print(f"   Year {record['year']}: S&P {record['sp500_return']:.2%}, BAA {record['baa_bond_return']:.2%}")
+        }, _YEAR_RETURNS_FIELDS))
+        _write_lines(f"   Year {record['year']}: S&P {record['sp500_return']:.2%}, BAA {record['baa_bond_return']:.2%}"
+                     for record in low_returns)
     
     def text_search_queries(self):
         """Text search and pattern matching"""
@@ -118,11 +236,12 @@ class BondQueryEngine:
         
         # 2. Regex search on alert types
         print("\n2. 🔍 Alert Types containing 'Bond':")
-        bond_alerts = list(self.alerts.find({
-            'alert_type': {'$regex': 'Bond', '$options': 'i'}
-        }))
-        for alert in bond_alerts[:5]:
-            print(f"   Year {alert['year']}: {alert['alert_type']}")
+        bond_alerts = list(self.alerts.find(
+            {'alert_type': {'$regex': 'Bond', '$options': 'i'}},
+            {'year': 1, 'alert_type': 1, '_id': 0}
+        ).limit(5))
+        _write_lines(f"   Year {alert['year']}: {alert['alert_type']}"
+                     for alert in bond_alerts)
     
     def aggregation_queries(self):
         """Aggregation pipeline examples"""
@@ -130,76 +249,24 @@ class BondQueryEngine:
         print("AGGREGATION PIPELINES")
         print("="*60)
         
-        # 1. Average returns by decade
-        print("\n1. 📊 Average Returns by Decade:")
-        decade_pipeline = [
-            {
-                '$addFields': {
-                    'decade': {
-                        '$subtract': [
-                            {'$mod': ['$year', 10]},
-                            '$year'
-                        ]
-                    }
-                }
-            },
-            {
-                '$group': {
-                    '_id': '$decade',
-                    'avg_sp500': {'$avg': '$sp500_return'},
-                    'avg_baa': {'$avg': '$baa_bond_return'},
-                    'avg_treasury': {'$avg': '$us_treasury_return'},
-                    'count': {'$sum': 1}
-                }
-            },
-            {'$sort': {'_id': 1}}
-        ]
+        # 1 & 2. Decade averages and best/worst years share one $facet scan
+        facets = next(self.records.aggregate(self._FACET_PIPELINE, allowDiskUse=True), {})
         
-        decade_results = list(self.records.aggregate(decade_pipeline))
-        for result in decade_results:
-            print(f"   {result['_id']}s: S&P {result['avg_sp500']:.2%}, BAA {result['avg_baa']:.2%}, Count: {result['count']}")
+        print("\n1. 📊 Average Returns by Decade:")
+        _write_lines(f"   {result['_id']}s: S&P {result['avg_sp500']:.2%}, BAA {result['avg_baa']:.2%}, Count: {result['count']}"
+                     for result in facets.get('by_decade', []))
         
-        # 2. Best and worst years
         print("\n2. 🏆 Best & Worst Years:")
-        best_worst_pipeline = [
-            {
-                '$group': {
-                    '_id': None,
-                    'best_year': {'$max': {'$mergeObjects': [
-                        {'year': '$year', 'sp500': '$sp500_return'},
-                        {'score': '$sp500_return'}
-                    ]}},
-                    'worst_year': {'$min': {'$mergeObjects': [
-                        {'year': '$year', 'sp500': '$sp500_return'},
-                        {'score': '$sp500_return'}
-                    ]}}
-                }
-            }
-        ]
-        
-        best_worst = list(self.records.aggregate(best_worst_pipeline))
-        if best_worst:
-            result = best_worst[0]
-            print(f"   Best Year: {result['best_year']['year']} ({result['best_year']['sp500']:.2%})")
-            print(f"   Worst Year: {result['worst_year']['year']} ({result['worst_year']['sp500']:.2%})")
+        if facets.get('best') and facets.get('worst'):
+            best, worst = facets['best'][0], facets['worst'][0]
+            print(f"   Best Year: {best['year']} ({best['sp500_return']:.2%})")
+            print(f"   Worst Year: {worst['year']} ({worst['sp500_return']:.2%})")
         
         # 3. Alert frequency by year
         print("\n3. 🚨 Alert Frequency by Year:")
-        alert_freq_pipeline = [
-            {
-                '$group': {
-                    '_id': '$year',
-                    'alert_count': {'$sum': 1},
-                    'alert_types': {'$addToSet': '$alert_type'}
-                }
-            },
-            {'$sort': {'alert_count': -1}},
-            {'$limit': 5}
-        ]
-        
-        alert_freq = list(self.alerts.aggregate(alert_freq_pipeline))
-        for result in alert_freq:
-            print(f"   Year {result['_id']}: {result['alert_count']} alerts")
+        alert_freq = list(self.alerts.aggregate(self._ALERT_FREQ_PIPELINE))
+        _write_lines(f"   Year {result['_id']}: {result['alert_count']} alerts"
+                     for result in alert_freq)
     
     def advanced_queries(self):
         """Advanced query techniques"""
@@ -216,28 +283,26 @@ class BondQueryEngine:
                 {'sp500_return': {'$gt': 0.30}},
                 {'sp500_return': {'$lt': -0.20}}
             ]
-        }))
-        for record in volatile_years:
-            print(f"   Year {record['year']}: {record['sp500_return']:.2%} (Alert Year)")
+        }, _YEAR_SP500_FIELDS))
+        _write_lines(f"   Year {record['year']}: {record['sp500_return']:.2%} (Alert Year)"
+                     for record in volatile_years)
         
         # 2. Date range queries
         print("\n2. 📅 Recent Alerts (Last 30 days):")
         thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_alerts = list(self.alerts.find({
-            'alert_time': {'$gte': thirty_days_ago}
-        }))
-        print(f"   Found {len(recent_alerts)} recent alerts")
+        recent_count = self.alerts.count_documents(
+            {'alert_time': {'$gte': thirty_days_ago}}
+        )
+        print(f"   Found {recent_count} recent alerts")
         
         # 3. Array operations with $elemMatch
         print("\n3. 🔍 Complex Alert Patterns:")
-        complex_alerts = list(self.alerts.find({
-            '$and': [
-                {'sp500_return': {'$lt': 0.05}},
-                {'baa_bond_return': {'$lt': 0.05}}
-            ]
-        }))
-        for alert in complex_alerts:
-            print(f"   Year {alert['year']}: Both low - S&P {alert['sp500_return']:.2%}, BAA {alert['baa_bond_return']:.2%}")
+        complex_alerts = list(self.alerts.find(
+            {'sp500_return': {'$lt': 0.05}, 'baa_bond_return': {'$lt': 0.05}},
+            {'year': 1, 'sp500_return': 1, 'baa_bond_return': 1, '_id': 0}
+        ))
+        _write_lines(f"   Year {alert['year']}: Both low - S&P {alert['sp500_return']:.2%}, BAA {alert['baa_bond_return']:.2%}"
+                     for alert in complex_alerts)
     
     def performance_queries(self):
         """Performance-optimized queries"""
@@ -258,27 +323,45 @@ class BondQueryEngine:
         print("\n2. 📋 Field Projection (Only S&P Returns):")
         projected = list(self.records.find(
             {'sp500_return': {'$gt': 0}},
-            {'year': 1, 'sp500_return': 1, '_id': 0}
+            _YEAR_SP500_FIELDS
         ).limit(5))
-        for record in projected:
-            print(f"   Year {record['year']}: {record['sp500_return']:.2%}")
+        _write_lines(_format_year_returns(projected))
         
         # 3. Limit and skip for pagination
         print("\n3. 📄 Pagination (Page 2, 3 records per page):")
-        page2 = list(self.records.find({}).skip(3).limit(3))
-        for record in page2:
-            print(f"   Year {record['year']}: S&P {record['sp500_return']:.2%}")
+        page2 = list(self.records.find({}, _YEAR_SP500_FIELDS).skip(3).limit(3))
+        _write_lines(f"   Year {record['year']}: S&P {record['sp500_return']:.2%}"
+                     for record in page2)
     
     def run_all_queries(self):
         """Execute all query examples"""
+        sections = [
+            self.basic_queries,
+            self.comparison_queries,
+            self.logical_queries,
+            self.text_search_queries,
+            self.aggregation_queries,
+            self.advanced_queries,
+            self.performance_queries
+        ]
+        
         try:
-            self.basic_queries()
-            self.comparison_queries()
-            self.logical_queries()
-            self.text_search_queries()
-            self.aggregation_queries()
-            self.advanced_queries()
-            self.performance_queries()
+            # Sections are independent reads, so overlap their round-trips and
+            # print each one's captured output in the original order afterwards
+            real_stdout = sys.stdout
+            sys.stdout = output = _SectionOutput(real_stdout)
+            try:
+                with ThreadPoolExecutor(max_workers=len(sections)) as executor:
+                    section_text = list(executor.map(output.capture, sections))
+            finally:
+                sys.stdout = real_stdout
+            
+            # Every section's output is written, then the first failure is reported
+            for text, _ in section_text:
+                sys.stdout.write(text)
+            errors = [error for _, error in section_text if error is not None]
+            if errors:
+                raise errors[0]
             
             print("\n" + "="*60)
             print("✅ ALL QUERIES COMPLETED SUCCESSFULLY!")
@@ -3,29 +3,77 @@ Simple Business Analytics Suite
 Working analytics for your MongoDB business data
 """
 
+import bson
+import numpy as np
 import pandas as pd
 from pymongo import MongoClient
+from pymongo.errors import OperationFailure
+import hashlib
+import io
 import json
+import os
+import pickle
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import time
 
-class SimpleBusinessAnalytics:
-    """Simple but comprehensive analytics suite"""
-    
-    def __init__(self, connection_string):
-        self.client = MongoClient(connection_string)
-        self.db = self.client['business_data']
-        self.collection = self.db['company_metrics']
+try:
+    import orjson
+except ImportError:
+    # orjson is optional: results are written with the stdlib encoder instead
+    orjson = None
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    # numba is optional: without it _stats_kernel is swapped for NumPy routines
+    HAVE_NUMBA = False
+    prange = range
     
-    def financial_performance(self):
-        """Financial performance analysis"""
-        print("\n" + "="*60)
-        print("📊 FINANCIAL PERFORMANCE ANALYSIS")
-        print("="*60)
-        
-        # Revenue trends by year
-        print("\n1. 📈 Revenue Trends by Year:")
-        revenue_trends = list(self.collection.aggregate([
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
+# Leading stage for every aggregation: only the metric fields travel through
+# the pipeline instead of whole documents
+_ANALYTICS_PROJECT = {"$project": {
+    "_id": 0,
+    "Year": 1,
+    "Total_Revenue": 1,
+    "Total_Sales": 1,
+    "Profit_Margin": 1,
+    "Revenue_Growth": 1,
+    "Market_Cap": 1
+}}
+
+# Cursor batch size for aggregations: projected metric rows are ~150 bytes,
+# so batches stay well under the ~4MB point where server-side copies slow down
+AGGREGATE_BATCH_SIZE = 2000
+
+# Collection totals and the busiest year (memoized by _load_totals)
+_TOTALS_PIPELINE = [
+    {"$facet": {
+        "totals": [
+            {"$group": {
+                "_id": None,
+                "rev": {"$sum": "$Total_Revenue"},
+                "mcap": {"$sum": "$Market_Cap"}
+            }}
+        ],
+        "years": [
+            {"$group": {"_id": "$Year", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+            {"$limit": 1}
+        ]
+    }}
+]
+
+# financial_performance: revenue trends, profit margins and sales/revenue in one scan
+_FINANCIAL_PIPELINE = [
+    {"$facet": {
+        "revenue_trends": [
             {"$group": {
                 "_id": "$Year", 
                 "avg_revenue": {"$avg": "$Total_Revenue"},
@@ -33,14 +81,8 @@ class SimpleBusinessAnalytics:
                 "count": {"$sum": 1}
             }},
             {"$sort": {"_id": 1}}
-        ]))
-        
-        for trend in revenue_trends:
-            print(f"   {trend['_id']}: Avg ${trend['avg_revenue']:,.0f}, Total ${trend['total_revenue']:,.0f} ({trend['count']:,} companies)")
-        
-        # Profit margin analysis
-        print("\n2. 💰 Profit Margin Analysis:")
-        profit_analysis = list(self.collection.aggregate([
+        ],
+        "profit_analysis": [
             {"$group": {
                 "_id": None,
                 "avg_profit_margin": {"$avg": "$Profit_Margin"},
@@ -48,30 +90,401 @@ class SimpleBusinessAnalytics:
                 "max_profit_margin": {"$max": "$Profit_Margin"},
                 "high_profit_companies": {"$sum": {"$cond": [{"$gt": ["$Profit_Margin", 0.8]}, 1, 0]}}
             }}
-        ]))
-        
-        if profit_analysis:
-            pa = profit_analysis[0]
-            print(f"   Average Profit Margin: {pa['avg_profit_margin']:.2%}")
-            print(f"   Profit Margin Range: {pa['min_profit_margin']:.2%} - {pa['max_profit_margin']:.2%}")
-            print(f"   High Profit Companies (>80%): {pa['high_profit_companies']:,}")
-        
-        # Sales vs Revenue ratio
-        print("\n3. 🔄 Sales vs Revenue Analysis:")
-        sales_revenue = list(self.collection.aggregate([
+        ],
+        "sales_revenue": [
+            {"$match": {"Total_Revenue": {"$gt": 0}}},
             {"$group": {
                 "_id": None,
                 "total_sales": {"$sum": "$Total_Sales"},
                 "total_revenue": {"$sum": "$Total_Revenue"},
-                "avg_sales_ratio": {"$avg": {"$divide": ["$Total_Sales", "$Total_Revenue"]}}
+                "sum_ratio": {"$sum": {"$divide": ["$Total_Sales", "$Total_Revenue"]}},
+                "n": {"$sum": 1}
+            }}
+        ]
+    }}
+]
+
+# growth_analysis: yearly growth rates and high-growth companies in one scan
+_GROWTH_PIPELINE = [
+    {"$facet": {
+        "growth_rates": [
+            {"$group": {
+                "_id": "$Year",
+                "avg_growth": {"$avg": "$Revenue_Growth"},
+                "positive_growth": {"$sum": {"$cond": [{"$gt": ["$Revenue_Growth", 0]}, 1, 0]}},
+                "negative_growth": {"$sum": {"$cond": [{"$lt": ["$Revenue_Growth", 0]}, 1, 0]}},
+                "total_companies": {"$sum": 1}
+            }},
+            {"$sort": {"_id": 1}}
+        ],
+        "high_growth": [
+            {"$match": {"Revenue_Growth": {"$gt": 0.20}}},
+            {"$group": {
+                "_id": "$Year",
+                "high_growth_count": {"$sum": 1},
+                "avg_high_growth": {"$avg": "$Revenue_Growth"},
+                "avg_revenue_high_growth": {"$avg": "$Total_Revenue"}
+            }},
+            {"$sort": {"_id": 1}}
+        ]
+    }}
+]
+
+# Lower bound of each $bucket range -> display name
+_GROWTH_CATEGORIES = {
+    float("-inf"): "Strong Decline (<-20%)",
+    -0.2: "Decline (<0%)",
+    0: "Slow Growth (0-10%)",
+    0.10: "Moderate Growth (10-20%)",
+    0.20: "Fast Growth (>20%)"
+}
+
+# growth_analysis: every growth range tallied in one $bucket pass
+_GROWTH_BUCKET_PIPELINE = [
+    {"$bucket": {
+        "groupBy": "$Revenue_Growth",
+        "boundaries": [*_GROWTH_CATEGORIES, float("inf")],
+        "default": "other",
+        "output": {"count": {"$sum": 1}}
+    }}
+]
+
+# market_segmentation: company size bands via a $switch-keyed $group
+_SIZE_SEGMENT_PIPELINE = [
+    {"$group": {
+        "_id": {"$switch": {
+            "branches": [
+                {"case": {"$lt": ["$Total_Revenue", 10000000]}, "then": "Small (<$10M)"},
+                {"case": {"$lt": ["$Total_Revenue", 100000000]}, "then": "Medium ($10M-$100M)"},
+                {"case": {"$lt": ["$Total_Revenue", 1000000000]}, "then": "Large ($100M-$1B)"}
+            ],
+            "default": "Enterprise (>$1B)"
+        }},
+        "count": {"$sum": 1},
+        "avg_revenue": {"$avg": "$Total_Revenue"},
+        "avg_profit_margin": {"$avg": "$Profit_Margin"},
+        "total_market_cap": {"$sum": "$Market_Cap"}
+    }},
+    {"$sort": {"avg_revenue": 1}}
+]
+
+# market_segmentation: performance segments in report order; they overlap,
+# so a company can count towards several of them
+_PERFORMANCE_SEGMENTS = [
+    ("Star Performers", {"$and": [
+        {"$gt": ["$Profit_Margin", 0.8]},
+        {"$gt": ["$Revenue_Growth", 0.15]}
+    ]}),
+    ("High Profit", {"$gt": ["$Profit_Margin", 0.8]}),
+    ("Fast Growers", {"$gt": ["$Revenue_Growth", 0.15]}),
+    ("Steady Performers", {"$and": [
+        {"$gt": ["$Profit_Margin", 0.5]},
+        {"$gt": ["$Revenue_Growth", 0]}
+    ]}),
+    ("Needs Improvement", {"$and": [
+        {"$lte": ["$Profit_Margin", 0.5]},
+        {"$lte": ["$Revenue_Growth", 0]}
+    ]})
+]
+
+# One $facet branch per segment, so all of them still share a single scan
+_PERFORMANCE_SEGMENT_PIPELINE = [
+    {"$facet": {
+        name: [
+            {"$match": {"$expr": condition}},
+            {"$group": {
+                "_id": name,
+                "count": {"$sum": 1},
+                "avg_revenue": {"$avg": "$Total_Revenue"},
+                "avg_profit_margin": {"$avg": "$Profit_Margin"},
+                "avg_growth": {"$avg": "$Revenue_Growth"}
+            }}
+        ]
+        for name, condition in _PERFORMANCE_SEGMENTS
+    }}
+]
+
+# Fields reported for each benchmark company
+_BENCHMARK_PROJECTION = {
+    "Year": 1, "Total_Revenue": 1, "Total_Sales": 1,
+    "Market_Cap": 1, "Profit_Margin": 1, "Revenue_Growth": 1
+}
+
+# Correlations reported by statistical_analysis, as (x, y) field pairs
+_CORR_PAIRS = {
+    "revenue_sales_corr": ("Total_Revenue", "Total_Sales"),
+    "revenue_profit_corr": ("Total_Revenue", "Profit_Margin"),
+    "growth_profit_corr": ("Revenue_Growth", "Profit_Margin"),
+    "market_cap_revenue_corr": ("Market_Cap", "Total_Revenue")
+}
+_CORR_FIELDS = sorted({f for pair in _CORR_PAIRS.values() for f in pair})
+
+def _correlations_from_sums(sums):
+    """Pearson r for each _CORR_PAIRS entry from the server's running sums"""
+    n = sums["n"]
+    corr = {}
+    for name, (x, y) in _CORR_PAIRS.items():
+        cov = n * sums[f"xy_{name}"] - sums[f"sum_{x}"] * sums[f"sum_{y}"]
+        var_x = n * sums[f"sq_{x}"] - sums[f"sum_{x}"] ** 2
+        var_y = n * sums[f"sq_{y}"] - sums[f"sum_{y}"] ** 2
+        corr[name] = cov / np.sqrt(var_x * var_y) if var_x > 0 and var_y > 0 else float("nan")
+    return corr
+
+# statistical_analysis: revenue stats, correlations and percentiles in one scan
+_STATISTICS_PIPELINE = [
+    {"$facet": {
+        "revenue_stats": [
+            {"$group": {
+                "_id": None,
+                "min_revenue": {"$min": "$Total_Revenue"},
+                "max_revenue": {"$max": "$Total_Revenue"},
+                "avg_revenue": {"$avg": "$Total_Revenue"},
+                "total_companies": {"$sum": 1}
+            }}
+        ],
+        "correlations": [
+            {"$match": {field: {"$type": "number"} for field in _CORR_FIELDS}},
+            {"$group": {
+                "_id": None,
+                "n": {"$sum": 1},
+                **{f"sum_{f}": {"$sum": f"${f}"} for f in _CORR_FIELDS},
+                **{f"sq_{f}": {"$sum": {"$multiply": [f"${f}", f"${f}"]}} for f in _CORR_FIELDS},
+                **{f"xy_{name}": {"$sum": {"$multiply": [f"${x}", f"${y}"]}}
+                   for name, (x, y) in _CORR_PAIRS.items()}
+            }}
+        ],
+        "percentiles": [
+            {"$group": {
+                "_id": None,
+                "p10_revenue": {"$percentile": {"input": "$Total_Revenue", "p": [0.1], "method": "approximate"}},
+                "p25_revenue": {"$percentile": {"input": "$Total_Revenue", "p": [0.25], "method": "approximate"}},
+                "p50_revenue": {"$percentile": {"input": "$Total_Revenue", "p": [0.5], "method": "approximate"}},
+                "p75_revenue": {"$percentile": {"input": "$Total_Revenue", "p": [0.75], "method": "approximate"}},
+                "p90_revenue": {"$percentile": {"input": "$Total_Revenue", "p": [0.9], "method": "approximate"}}
             }}
-        ]))
+        ]
+    }}
+]
+
+# Pickled run results, keyed by a fingerprint of the collection contents
+ANALYTICS_CACHE_DIR = '.analytics_cache'
+
+# Revenue percentile ranks reported by statistical_analysis
+PERCENTILE_RANKS = np.array([0.1, 0.25, 0.5, 0.75, 0.9])
+
+@njit(cache=True, fastmath=True, parallel=True)
+def _stats_kernel(revenue, sales, margin, market_cap, growth, ranks):
+    """Pearson correlations and revenue percentiles over column arrays
+    
+    Returns (corr, pct): corr holds revenue/sales, revenue/margin,
+    growth/margin and market cap/revenue; pct holds one revenue value per rank.
+    """
+    n = revenue.shape[0]
+    
+    # Pass 1: column means
+    s_rev = s_sales = s_margin = s_mcap = s_growth = 0.0
+    for i in prange(n):
+        s_rev += revenue[i]
+        s_sales += sales[i]
+        s_margin += margin[i]
+        s_mcap += market_cap[i]
+        s_growth += growth[i]
+    m_rev = s_rev / n
+    m_sales = s_sales / n
+    m_margin = s_margin / n
+    m_mcap = s_mcap / n
+    m_growth = s_growth / n
+    
+    # Pass 2: centred sums of squares and cross-products
+    v_rev = v_sales = v_margin = v_mcap = v_growth = 0.0
+    c_rev_sales = c_rev_margin = c_growth_margin = c_mcap_rev = 0.0
+    for i in prange(n):
+        d_rev = revenue[i] - m_rev
+        d_sales = sales[i] - m_sales
+        d_margin = margin[i] - m_margin
+        d_mcap = market_cap[i] - m_mcap
+        d_growth = growth[i] - m_growth
+        v_rev += d_rev * d_rev
+        v_sales += d_sales * d_sales
+        v_margin += d_margin * d_margin
+        v_mcap += d_mcap * d_mcap
+        v_growth += d_growth * d_growth
+        c_rev_sales += d_rev * d_sales
+        c_rev_margin += d_rev * d_margin
+        c_growth_margin += d_growth * d_margin
+        c_mcap_rev += d_mcap * d_rev
+    
+    corr = np.empty(4)
+    corr[0] = c_rev_sales / np.sqrt(v_rev * v_sales)
+    corr[1] = c_rev_margin / np.sqrt(v_rev * v_margin)
+    corr[2] = c_growth_margin / np.sqrt(v_growth * v_margin)
+    corr[3] = c_mcap_rev / np.sqrt(v_mcap * v_rev)
+    
+    # Percentiles by linear interpolation between closest ranks
+    ordered = np.sort(revenue)
+    pct = np.empty(ranks.shape[0])
+    for k in range(ranks.shape[0]):
+        pos = ranks[k] * (n - 1)
+        lo = int(np.floor(pos))
+        hi = min(lo + 1, n - 1)
+        pct[k] = ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+    
+    return corr, pct
+
+def _stats_numpy(revenue, sales, margin, market_cap, growth, ranks):
+    """_stats_kernel built from np.corrcoef / np.quantile, for installs without numba"""
+    c = np.corrcoef(np.vstack((revenue, sales, margin, market_cap, growth)))
+    corr = np.array([c[0, 1], c[0, 2], c[4, 2], c[3, 0]])
+    return corr, np.quantile(revenue, ranks)
+
+if not HAVE_NUMBA:
+    # An un-jitted kernel would loop in the interpreter; NumPy's C loops are far faster
+    _stats_kernel = _stats_numpy
+
+class SimpleBusinessAnalytics:
+    """Simple but comprehensive analytics suite"""
+    
+    # Set once the top-10 benchmark indexes have been created in this process
+    _indexes_ready = False
+    
+    def __init__(self, connection_string):
+        # Wire compression: the server picks the first algorithm both sides support
+        self.client = MongoClient(
+            connection_string,
+            compressors="zstd,zlib",
+            zlibCompressionLevel=6,
+            serverSelectionTimeoutMS=5000
+        )
+        # Fail fast on bad DNS/auth instead of stalling on the first query
+        self.client.admin.command("ping")
+        self.db = self.client['business_data']
+        self.collection = self.db['company_metrics']
+        # Collection-wide totals, computed on first use and then reused;
+        # nothing in the suite writes, so the cache never goes stale
+        self._cached = {}
+        self._cache_fresh = False
+        self._cache_lock = threading.Lock()
+        
+        # Output buffering: _p writes to the calling thread's buffer when one
+        # is set (run_all_analytics and its workers) and to stdout otherwise
+        self._out = io.StringIO()
+        self._local = threading.local()
+        self._ensure_indexes()
+    
+    def _ensure_indexes(self):
+        """Create descending indexes so the top-10 sorts stream from an IXSCAN"""
+        if SimpleBusinessAnalytics._indexes_ready:
+            return
+        try:
+            for field in ("Market_Cap", "Profit_Margin", "Revenue_Growth"):
+                self.collection.create_index([(field, -1)])
+        except OperationFailure as e:
+            # Read-only users can still run the suite; the top-10 reads just sort in memory
+            self._p(f"⚠️  Skipping benchmark indexes: {e}")
+        SimpleBusinessAnalytics._indexes_ready = True
+    
+    def close(self):
+        """Close the MongoDB connection once the suite is no longer needed"""
+        self.client.close()
+    
+    def _p(self, msg=""):
+        """Print a line into the active output buffer"""
+        out = getattr(self._local, 'out', None)
+        (out if out is not None else sys.stdout).write(f"{msg}\n")
+    
+    def _capture(self, method):
+        """Run an analysis in a worker thread and return (its output, its result)"""
+        self._local.out = io.StringIO()
+        try:
+            result = method()
+            return self._local.out.getvalue(), result
+        finally:
+            self._local.out = None
+    
+    def _agg(self, stages, **kwargs):
+        """Run an aggregation with the metric-field $project prepended"""
+        kwargs.setdefault('batchSize', AGGREGATE_BATCH_SIZE)
+        return self.collection.aggregate([_ANALYTICS_PROJECT, *stages], **kwargs)
+    
+    def _load_totals(self):
+        """Fetch collection totals and the busiest year in one $facet and memoize them"""
+        with self._cache_lock:
+            if not self._cache_fresh:
+                self._cached = self._fetch_totals()
+                self._cache_fresh = True
+        return self._cached
+    
+    def _fetch_totals(self):
+        """Run the totals/busiest-year $facet"""
+        summary = next(self._agg(_TOTALS_PIPELINE), {})
+        totals = (summary.get("totals") or [{"rev": 0, "mcap": 0}])[0]
+        
+        return {
+            # Unfiltered count: the collection metadata is exact enough here
+            'total_companies': self.collection.estimated_document_count(),
+            'total_revenue': totals['rev'],
+            'total_market_cap': totals['mcap'],
+            'busiest_year': summary.get("years", [])
+        }
+    
+    @property
+    def total_companies(self):
+        """Number of documents in the collection (cached)"""
+        return self._load_totals()['total_companies']
+    
+    @property
+    def total_revenue(self):
+        """Sum of Total_Revenue across the collection (cached)"""
+        return self._load_totals()['total_revenue']
+    
+    @property
+    def total_market_cap(self):
+        """Sum of Market_Cap across the collection (cached)"""
+        return self._load_totals()['total_market_cap']
+    
+    def financial_performance(self):
+        """Financial performance analysis
+        
+        The sales vs revenue figures only cover companies with positive
+        Total_Revenue; zero- or negative-revenue rows have no meaningful ratio.
+        """
+        self._p("\n" + "="*60)
+        self._p("📊 FINANCIAL PERFORMANCE ANALYSIS")
+        self._p("="*60)
+        
+        # Revenue trends, profit margins and sales/revenue share one $facet scan
+        facets = next(self._agg(_FINANCIAL_PIPELINE), {})
+        revenue_trends = facets.get("revenue_trends", [])
+        profit_analysis = facets.get("profit_analysis", [])
+        sales_revenue = facets.get("sales_revenue", [])
+        
+        # Revenue trends by year
+        self._p("\n1. 📈 Revenue Trends by Year:")
+        if revenue_trends:
+            # Column-wise formatting keeps the per-row work inside pandas
+            df = pd.DataFrame(revenue_trends)
+            lines = ("   " + df["_id"].astype(str)
+                     + ": Avg " + df["avg_revenue"].map("${:,.0f}".format)
+                     + ", Total " + df["total_revenue"].map("${:,.0f}".format)
+                     + " (" + df["count"].map("{:,}".format) + " companies)")
+            self._p("\n".join(lines))
+        
+        # Profit margin analysis
+        self._p("\n2. 💰 Profit Margin Analysis:")
+        if profit_analysis:
+            pa = profit_analysis[0]
+            self._p(f"   Average Profit Margin: {pa['avg_profit_margin']:.2%}")
+            self._p(f"   Profit Margin Range: {pa['min_profit_margin']:.2%} - {pa['max_profit_margin']:.2%}")
+            self._p(f"   High Profit Companies (>80%): {pa['high_profit_companies']:,}")
         
+        # Sales vs Revenue ratio
+        self._p("\n3. 🔄 Sales vs Revenue Analysis:")
         if sales_revenue:
             sr = sales_revenue[0]
             overall_ratio = sr['total_sales'] / sr['total_revenue']
-            print(f"   Overall Sales/Revenue Ratio: {overall_ratio:.2%}")
-            print(f"   Average Company Sales/Revenue Ratio: {sr['avg_sales_ratio']:.2%}")
+            sr['avg_sales_ratio'] = sr['sum_ratio'] / sr['n'] if sr['n'] else 0
+            self._p(f"   Overall Sales/Revenue Ratio: {overall_ratio:.2%}")
+            self._p(f"   Average Company Sales/Revenue Ratio: {sr['avg_sales_ratio']:.2%}")
         
         return {
             'revenue_trends': revenue_trends,
@@ -81,149 +494,85 @@ class SimpleBusinessAnalytics:
     
     def growth_analysis(self):
         """Growth patterns analysis"""
-        print("\n" + "="*60)
-        print("📈 GROWTH ANALYTICS")
-        print("="*60)
+        self._p("\n" + "="*60)
+        self._p("📈 GROWTH ANALYTICS")
+        self._p("="*60)
         
-        # Year-over-year growth rates
-        print("\n1. 📊 Year-over-Year Growth Rates:")
-        growth_rates = list(self.collection.aggregate([
-            {"$group": {
-                "_id": "$Year",
-                "avg_growth": {"$avg": "$Revenue_Growth"},
-                "positive_growth": {"$sum": {"$cond": [{"$gt": ["$Revenue_Growth", 0]}, 1, 0]}},
-                "negative_growth": {"$sum": {"$cond": [{"$lt": ["$Revenue_Growth", 0]}, 1, 0]}},
-                "total_companies": {"$sum": 1}
-            }},
-            {"$sort": {"_id": 1}}
-        ]))
+        # Yearly growth rates and high-growth companies share one $facet scan
+        facets = next(self._agg(_GROWTH_PIPELINE), {})
+        growth_rates = facets.get("growth_rates", [])
+        high_growth = facets.get("high_growth", [])
         
+        # Year-over-year growth rates
+        self._p("\n1. 📊 Year-over-Year Growth Rates:")
         for growth in growth_rates:
             positive_pct = growth['positive_growth'] / growth['total_companies'] * 100
             negative_pct = growth['negative_growth'] / growth['total_companies'] * 100
-            print(f"   {growth['_id']}: Avg Growth {growth['avg_growth']:.2%}, "
+            self._p(f"   {growth['_id']}: Avg Growth {growth['avg_growth']:.2%}, "
                   f"Positive {positive_pct:.1f}%, Negative {negative_pct:.1f}%")
         
         # High-growth companies
-        print("\n2. 🚀 High-Growth Companies (>20% growth):")
-        high_growth = list(self.collection.aggregate([
-            {"$match": {"Revenue_Growth": {"$gt": 0.20}}},
-            {"$group": {
-                "_id": "$Year",
-                "high_growth_count": {"$sum": 1},
-                "avg_high_growth": {"$avg": "$Revenue_Growth"},
-                "avg_revenue_high_growth": {"$avg": "$Total_Revenue"}
-            }},
-            {"$sort": {"_id": 1}}
-        ]))
-        
+        self._p("\n2. 🚀 High-Growth Companies (>20% growth):")
         for hg in high_growth:
-            print(f"   {hg['_id']}: {hg['high_growth_count']:,} companies, "
+            self._p(f"   {hg['_id']}: {hg['high_growth_count']:,} companies, "
                   f"Avg Growth {hg['avg_high_growth']:.2%}, "
                   f"Avg Revenue ${hg['avg_revenue_high_growth']:,.0f}")
         
-        # Growth distribution (simplified)
-        print("\n3. 📊 Growth Distribution:")
-        growth_categories = [
-            {"name": "Strong Decline (<-20%)", "condition": {"$lt": ["$Revenue_Growth", -0.2]}},
-            {"name": "Decline (<0%)", "condition": {"$lt": ["$Revenue_Growth", 0]}},
-            {"name": "Slow Growth (0-10%)", "condition": {"$lt": ["$Revenue_Growth", 0.10]}},
-            {"name": "Moderate Growth (10-20%)", "condition": {"$lt": ["$Revenue_Growth", 0.20]}},
-            {"name": "Fast Growth (>20%)", "condition": {"$gte": ["$Revenue_Growth", 0.20]}}
-        ]
+        # Growth distribution: one $bucket pass tallies every range
+        self._p("\n3. 📊 Growth Distribution:")
+        buckets = self._agg(_GROWTH_BUCKET_PIPELINE)
+        bucket_counts = {bucket['_id']: bucket['count'] for bucket in buckets}
         
-        for category in growth_categories:
-            count = self.collection.count_documents({"Revenue_Growth": category["condition"]})
-            percentage = (count / 1100000) * 100
-            print(f"   {category['name']}: {count:,} companies ({percentage:.1f}%)")
+        N = self.total_companies
+        growth_distribution = []
+        for lower_bound, name in _GROWTH_CATEGORIES.items():
+            count = bucket_counts.get(lower_bound, 0)
+            percentage = (count / N) * 100 if N else 0
+            self._p(f"   {name}: {count:,} companies ({percentage:.1f}%)")
+            growth_distribution.append({'name': name, 'count': count, 'percentage': percentage})
         
         return {
             'growth_rates': growth_rates,
             'high_growth': high_growth,
-            'growth_distribution': growth_categories
+            'growth_distribution': growth_distribution
         }
     
     def market_segmentation(self):
         """Market segmentation analysis"""
-        print("\n" + "="*60)
-        print("🎯 MARKET SEGMENTATION")
-        print("="*60)
-        
-        # Company size segmentation
-        print("\n1. 🏢 Company Size Segmentation:")
-        
-        size_segments = [
-            {"name": "Small (<$10M)", "condition": {"$lt": ["$Total_Revenue", 10000000]}},
-            {"name": "Medium ($10M-$100M)", "condition": {"$and": [
-                {"$gte": ["$Total_Revenue", 10000000]},
-                {"$lt": ["$Total_Revenue", 100000000]}
-            ]}},
-            {"name": "Large ($100M-$1B)", "condition": {"$and": [
-                {"$gte": ["$Total_Revenue", 100000000]},
-                {"$lt": ["$Total_Revenue", 1000000000]}
-            ]}},
-            {"name": "Enterprise (>$1B)", "condition": {"$gte": ["$Total_Revenue", 1000000000]}}
-        ]
-        
-        for segment in size_segments:
-            companies = list(self.collection.aggregate([
-                {"$match": {"Total_Revenue": segment["condition"]}},
-                {"$group": {
-                    "_id": None,
-                    "count": {"$sum": 1},
-                    "avg_revenue": {"$avg": "$Total_Revenue"},
-                    "avg_profit_margin": {"$avg": "$Profit_Margin"},
-                    "total_market_cap": {"$sum": "$Market_Cap"}
-                }}
-            ]))
-            
-            if companies:
-                comp = companies[0]
-                percentage = (comp['count'] / 1100000) * 100
-                print(f"   {segment['name']}: {comp['count']:,} ({percentage:.1f}%)")
-                print(f"     Avg Revenue: ${comp['avg_revenue']:,.0f}")
-                print(f"     Avg Profit Margin: {comp['avg_profit_margin']:.2%}")
-                print(f"     Total Market Cap: ${comp['total_market_cap']:,.0f}")
-        
-        # Performance segmentation
-        print("\n2. ⭐ Performance-Based Segmentation:")
-        
-        perf_segments = [
-            {"name": "Star Performers", "condition": {"$and": [
-                {"$gt": ["$Profit_Margin", 0.8]},
-                {"$gt": ["$Revenue_Growth", 0.15]}
-            ]}},
-            {"name": "High Profit", "condition": {"$gt": ["$Profit_Margin", 0.8]}},
-            {"name": "Fast Growers", "condition": {"$gt": ["$Revenue_Growth", 0.15]}},
-            {"name": "Steady Performers", "condition": {"$and": [
-                {"$gt": ["$Profit_Margin", 0.5]},
-                {"$gt": ["$Revenue_Growth", 0]}
-            ]}},
-            {"name": "Needs Improvement", "condition": {"$and": [
-                {"$lte": ["$Profit_Margin", 0.5]},
-                {"$lte": ["$Revenue_Growth", 0]}
-            ]}}
-        ]
-        
-        for segment in perf_segments:
-            companies = list(self.collection.aggregate([
-                {"$match": segment["condition"]},
-                {"$group": {
-                    "_id": None,
-                    "count": {"$sum": 1},
-                    "avg_revenue": {"$avg": "$Total_Revenue"},
-                    "avg_profit_margin": {"$avg": "$Profit_Margin"},
-                    "avg_growth": {"$avg": "$Revenue_Growth"}
-                }}
-            ]))
-            
-            if companies:
-                comp = companies[0]
-                percentage = (comp['count'] / 1100000) * 100
-                print(f"   {segment['name']}: {comp['count']:,} ({percentage:.1f}%)")
-                print(f"     Avg Revenue: ${comp['avg_revenue']:,.0f}")
-                print(f"     Avg Profit Margin: {comp['avg_profit_margin']:.2%}")
-                print(f"     Avg Growth: {comp['avg_growth']:.2%}")
+        self._p("\n" + "="*60)
+        self._p("🎯 MARKET SEGMENTATION")
+        self._p("="*60)
+        
+        N = self.total_companies
+        
+        # Company size segmentation: one $group keyed by a $switch label
+        self._p("\n1. 🏢 Company Size Segmentation:")
+        cursor = self._agg(_SIZE_SEGMENT_PIPELINE)
+        
+        size_segments = []
+        for comp in cursor:
+            size_segments.append(comp)
+            percentage = (comp['count'] / N) * 100 if N else 0
+            self._p(f"   {comp['_id']}: {comp['count']:,} ({percentage:.1f}%)")
+            self._p(f"     Avg Revenue: ${comp['avg_revenue']:,.0f}")
+            self._p(f"     Avg Profit Margin: {comp['avg_profit_margin']:.2%}")
+            self._p(f"     Total Market Cap: ${comp['total_market_cap']:,.0f}")
+        
+        # Performance segmentation (overlapping segments, fixed order)
+        self._p("\n2. ⭐ Performance-Based Segmentation:")
+        facets = next(self._agg(_PERFORMANCE_SEGMENT_PIPELINE), {})
+        
+        perf_segments = []
+        for name, _ in _PERFORMANCE_SEGMENTS:
+            if not facets.get(name):
+                continue
+            comp = facets[name][0]
+            perf_segments.append(comp)
+            percentage = (comp['count'] / N) * 100 if N else 0
+            self._p(f"   {comp['_id']}: {comp['count']:,} ({percentage:.1f}%)")
+            self._p(f"     Avg Revenue: ${comp['avg_revenue']:,.0f}")
+            self._p(f"     Avg Profit Margin: {comp['avg_profit_margin']:.2%}")
+            self._p(f"     Avg Growth: {comp['avg_growth']:.2%}")
         
         return {
             'size_segments': size_segments,
@@ -232,44 +581,36 @@ class SimpleBusinessAnalytics:
     
     def performance_benchmarks(self):
         """Top and bottom performers"""
-        print("\n" + "="*60)
-        print("🏆 PERFORMANCE BENCHMARKS")
-        print("="*60)
+        self._p("\n" + "="*60)
+        self._p("🏆 PERFORMANCE BENCHMARKS")
+        self._p("="*60)
         
-        # Top performers by market cap
-        print("\n1. 💰 Top 10 Companies by Market Cap:")
-        top_market_cap = list(self.collection.find(
-            {}, 
-            {"Year": 1, "Total_Revenue": 1, "Total_Sales": 1, "Market_Cap": 1, "Profit_Margin": 1, "Revenue_Growth": 1}
-        ).sort("Market_Cap", -1).limit(10))
+        # Each top-10 list walks its descending index and stops after ten documents
+        def top10(field, query=None):
+            return list(self.collection.find(query or {}, _BENCHMARK_PROJECTION).sort(field, -1).limit(10))
         
+        # Top performers by market cap
+        self._p("\n1. 💰 Top 10 Companies by Market Cap:")
+        top_market_cap = top10("Market_Cap")
         for i, company in enumerate(top_market_cap, 1):
-            print(f"   {i}. Year {company['Year']}: Market Cap ${company['Market_Cap']:,.0f}")
-            print(f"      Revenue: ${company['Total_Revenue']:,.0f}, "
+            self._p(f"   {i}. Year {company['Year']}: Market Cap ${company['Market_Cap']:,.0f}")
+            self._p(f"      Revenue: ${company['Total_Revenue']:,.0f}, "
                   f"Profit Margin: {company['Profit_Margin']:.2%}, "
                   f"Growth: {company['Revenue_Growth']:.2%}")
         
         # Most profitable companies
-        print("\n2. 💎 Top 10 Most Profitable Companies:")
-        most_profitable = list(self.collection.find(
-            {"Profit_Margin": {"$gt": 0}},
-            {"Year": 1, "Total_Revenue": 1, "Profit_Margin": 1, "Revenue_Growth": 1}
-        ).sort("Profit_Margin", -1).limit(10))
-        
+        self._p("\n2. 💎 Top 10 Most Profitable Companies:")
+        most_profitable = top10("Profit_Margin", {"Profit_Margin": {"$gt": 0}})
         for i, company in enumerate(most_profitable, 1):
-            print(f"   {i}. Year {company['Year']}: Profit Margin {company['Profit_Margin']:.2%}")
-            print(f"      Revenue: ${company['Total_Revenue']:,.0f}, Growth: {company['Revenue_Growth']:.2%}")
+            self._p(f"   {i}. Year {company['Year']}: Profit Margin {company['Profit_Margin']:.2%}")
+            self._p(f"      Revenue: ${company['Total_Revenue']:,.0f}, Growth: {company['Revenue_Growth']:.2%}")
         
         # Fastest growing companies
-        print("\n3. 🚀 Top 10 Fastest Growing Companies:")
-        fastest_growing = list(self.collection.find(
-            {"Revenue_Growth": {"$gt": 0}},
-            {"Year": 1, "Total_Revenue": 1, "Revenue_Growth": 1, "Profit_Margin": 1}
-        ).sort("Revenue_Growth", -1).limit(10))
-        
+        self._p("\n3. 🚀 Top 10 Fastest Growing Companies:")
+        fastest_growing = top10("Revenue_Growth", {"Revenue_Growth": {"$gt": 0}})
         for i, company in enumerate(fastest_growing, 1):
-            print(f"   {i}. Year {company['Year']}: Growth {company['Revenue_Growth']:.2%}")
-            print(f"      Revenue: ${company['Total_Revenue']:,.0f}, "
+            self._p(f"   {i}. Year {company['Year']}: Growth {company['Revenue_Growth']:.2%}")
+            self._p(f"      Revenue: ${company['Total_Revenue']:,.0f}, "
                   f"Profit Margin: {company['Profit_Margin']:.2%}")
         
         return {
@@ -280,68 +621,50 @@ class SimpleBusinessAnalytics:
     
     def statistical_analysis(self):
         """Statistical analysis"""
-        print("\n" + "="*60)
-        print("📊 STATISTICAL ANALYSIS")
-        print("="*60)
+        self._p("\n" + "="*60)
+        self._p("📊 STATISTICAL ANALYSIS")
+        self._p("="*60)
         
-        # Revenue distribution statistics
-        print("\n1. 💰 Revenue Distribution Statistics:")
-        revenue_stats = list(self.collection.aggregate([
-            {"$group": {
-                "_id": None,
-                "min_revenue": {"$min": "$Total_Revenue"},
-                "max_revenue": {"$max": "$Total_Revenue"},
-                "avg_revenue": {"$avg": "$Total_Revenue"},
-                "total_companies": {"$sum": 1}
-            }}
-        ]))
+        # Revenue stats, correlations and percentiles share one $facet scan;
+        # servers older than 7.0 reject $percentile and fall back to client-side math
+        try:
+            facets = next(self._agg(_STATISTICS_PIPELINE), {})
+        except OperationFailure:
+            facets = self._statistics_client_side()
+        revenue_stats = facets.get("revenue_stats", [])
+        correlations = facets.get("correlations", [])
+        if correlations and "n" in correlations[0]:
+            # The server returns sums only; finish Pearson's r here
+            correlations = [_correlations_from_sums(correlations[0])]
+        percentiles = facets.get("percentiles", [])
         
+        # Revenue distribution statistics
+        self._p("\n1. 💰 Revenue Distribution Statistics:")
         if revenue_stats:
             rs = revenue_stats[0]
-            print(f"   Companies: {rs['total_companies']:,}")
-            print(f"   Revenue Range: ${rs['min_revenue']:,.0f} - ${rs['max_revenue']:,.0f}")
-            print(f"   Average Revenue: ${rs['avg_revenue']:,.0f}")
+            self._p(f"   Companies: {rs['total_companies']:,}")
+            self._p(f"   Revenue Range: ${rs['min_revenue']:,.0f} - ${rs['max_revenue']:,.0f}")
+            self._p(f"   Average Revenue: ${rs['avg_revenue']:,.0f}")
         
         # Correlation analysis
-        print("\n2. 🔗 Correlation Analysis:")
-        correlations = list(self.collection.aggregate([
-            {"$group": {
-                "_id": None,
-                "revenue_sales_corr": {"$corr": ["$Total_Revenue", "$Total_Sales"]},
-                "revenue_profit_corr": {"$corr": ["$Total_Revenue", "$Profit_Margin"]},
-                "growth_profit_corr": {"$corr": ["$Revenue_Growth", "$Profit_Margin"]},
-                "market_cap_revenue_corr": {"$corr": ["$Market_Cap", "$Total_Revenue"]}
-            }}
-        ]))
-        
+        self._p("\n2. 🔗 Correlation Analysis:")
         if correlations:
             corr = correlations[0]
-            print(f"   Revenue ↔ Sales: {corr['revenue_sales_corr']:.4f}")
-            print(f"   Revenue ↔ Profit Margin: {corr['revenue_profit_corr']:.4f}")
-            print(f"   Growth ↔ Profit Margin: {corr['growth_profit_corr']:.4f}")
-            print(f"   Market Cap ↔ Revenue: {corr['market_cap_revenue_corr']:.4f}")
+            self._p(f"   Revenue ↔ Sales: {corr['revenue_sales_corr']:.4f}")
+            self._p(f"   Revenue ↔ Profit Margin: {corr['revenue_profit_corr']:.4f}")
+            self._p(f"   Growth ↔ Profit Margin: {corr['growth_profit_corr']:.4f}")
+            self._p(f"   Market Cap ↔ Revenue: {corr['market_cap_revenue_corr']:.4f}")
         
         # Percentile analysis
-        print("\n3. 📈 Percentile Analysis:")
-        percentiles = list(self.collection.aggregate([
-            {"$group": {
-                "_id": None,
-                "p10_revenue": {"$percentile": {"input": "$Total_Revenue", "p": [0.1], "method": "approximate"}},
-                "p25_revenue": {"$percentile": {"input": "$Total_Revenue", "p": [0.25], "method": "approximate"}},
-                "p50_revenue": {"$percentile": {"input": "$Total_Revenue", "p": [0.5], "method": "approximate"}},
-                "p75_revenue": {"$percentile": {"input": "$Total_Revenue", "p": [0.75], "method": "approximate"}},
-                "p90_revenue": {"$percentile": {"input": "$Total_Revenue", "p": [0.9], "method": "approximate"}}
-            }}
-        ]))
-        
+        self._p("\n3. 📈 Percentile Analysis:")
         if percentiles:
             p = percentiles[0]
-            print(f"   Revenue Percentiles:")
-            print(f"     10th: ${p['p10_revenue'][0]:,.0f}")
-            print(f"     25th: ${p['p25_revenue'][0]:,.0f}")
-            print(f"     50th: ${p['p50_revenue'][0]:,.0f}")
-            print(f"     75th: ${p['p75_revenue'][0]:,.0f}")
-            print(f"     90th: ${p['p90_revenue'][0]:,.0f}")
+            self._p(f"   Revenue Percentiles:")
+            self._p(f"     10th: ${p['p10_revenue'][0]:,.0f}")
+            self._p(f"     25th: ${p['p25_revenue'][0]:,.0f}")
+            self._p(f"     50th: ${p['p50_revenue'][0]:,.0f}")
+            self._p(f"     75th: ${p['p75_revenue'][0]:,.0f}")
+            self._p(f"     90th: ${p['p90_revenue'][0]:,.0f}")
         
         return {
             'revenue_stats': revenue_stats,
@@ -349,88 +672,181 @@ class SimpleBusinessAnalytics:
             'percentiles': percentiles
         }
     
+    def _statistics_client_side(self):
+        """Compute statistical_analysis results locally from the raw columns"""
+        fields = ["Total_Revenue", "Total_Sales", "Profit_Margin", "Market_Cap", "Revenue_Growth"]
+        # Decode one raw batch at a time into a float block; only the blocks stay alive
+        blocks = []
+        for batch in self.collection.find_raw_batches(
+            {field: {"$type": "number"} for field in fields},
+            {field: 1 for field in fields} | {"_id": 0},
+            batch_size=AGGREGATE_BATCH_SIZE
+        ):
+            blocks.append(np.array(
+                [[doc[field] for field in fields] for doc in bson.decode_all(batch)],
+                dtype=np.float64
+            ).reshape(-1, len(fields)))
+        if not blocks:
+            return {}
+        data = np.concatenate(blocks)
+        
+        columns = [np.ascontiguousarray(data[:, i]) for i in range(len(fields))]
+        revenue, sales, margin, market_cap, growth = columns
+        corr, pct = _stats_kernel(revenue, sales, margin, market_cap, growth, PERCENTILE_RANKS)
+        
+        return {
+            'revenue_stats': [{
+                "min_revenue": float(revenue.min()),
+                "max_revenue": float(revenue.max()),
+                "avg_revenue": float(revenue.mean()),
+                "total_companies": int(revenue.shape[0])
+            }],
+            'correlations': [{
+                "revenue_sales_corr": float(corr[0]),
+                "revenue_profit_corr": float(corr[1]),
+                "growth_profit_corr": float(corr[2]),
+                "market_cap_revenue_corr": float(corr[3])
+            }],
+            'percentiles': [{
+                f"p{round(rank * 100)}_revenue": [float(value)]
+                for rank, value in zip(PERCENTILE_RANKS, pct)
+            }]
+        }
+    
+    def _cache_path(self):
+        """Cache file for the current collection contents (count + newest _id)"""
+        newest = next(self.collection.find({}, {"_id": 1}).sort("_id", -1).limit(1), None)
+        fingerprint = "{}.{}:{}:{}".format(
+            self.db.name,
+            self.collection.name,
+            self.collection.estimated_document_count(),
+            newest["_id"] if newest else None
+        )
+        digest = hashlib.sha1(fingerprint.encode()).hexdigest()
+        return os.path.join(ANALYTICS_CACHE_DIR, f"{digest}.pkl")
+    
+    def _load_cached_run(self, cache_path):
+        """Return a previously pickled run for this fingerprint, if any"""
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+    
+    def _save_cached_run(self, cache_path, results):
+        """Pickle a finished run; a failed write only costs the next run a cache hit"""
+        try:
+            os.makedirs(ANALYTICS_CACHE_DIR, exist_ok=True)
+            with open(cache_path, 'wb') as f:
+                pickle.dump({'sections': results, 'totals': self._load_totals()}, f)
+        except (OSError, pickle.PicklingError) as e:
+            self._p(f"⚠️  Could not write analytics cache: {e}")
+    
     def executive_summary(self):
         """Generate executive summary"""
-        print("\n" + "="*80)
-        print("📋 EXECUTIVE SUMMARY - BUSINESS ANALYTICS REPORT")
-        print("="*80)
-        print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"Dataset: 1.1M business records (2015-2025)")
-        
-        # Quick stats
-        total_companies = self.collection.count_documents({})
-        total_revenue = list(self.collection.aggregate([{"$group": {"_id": None, "total": {"$sum": "$Total_Revenue"}}}]))
-        total_market_cap = list(self.collection.aggregate([{"$group": {"_id": None, "total": {"$sum": "$Market_Cap"}}}]))
-        
-        print(f"\n📊 KEY METRICS:")
-        print(f"   Total Companies: {total_companies:,}")
-        print(f"   Total Revenue: ${total_revenue[0]['total']:,.0f}")
-        print(f"   Total Market Cap: ${total_market_cap[0]['total']:,.0f}")
+        self._p("\n" + "="*80)
+        self._p("📋 EXECUTIVE SUMMARY - BUSINESS ANALYTICS REPORT")
+        self._p("="*80)
+        self._p(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        self._p(f"Dataset: {self.total_companies:,} business records (2015-2025)")
         
-        # Year with most data
-        year_counts = list(self.collection.aggregate([
-            {"$group": {"_id": "$Year", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 1}
-        ]))
+        self._p(f"\n📊 KEY METRICS:")
+        self._p(f"   Total Companies: {self.total_companies:,}")
+        self._p(f"   Total Revenue: ${self.total_revenue:,.0f}")
+        self._p(f"   Total Market Cap: ${self.total_market_cap:,.0f}")
         
+        # Year with most data
+        year_counts = self._load_totals()['busiest_year']
         if year_counts:
-            print(f"   Most Recent Year: {year_counts[0]['_id']} ({year_counts[0]['count']:,} records)")
+            self._p(f"   Most Recent Year: {year_counts[0]['_id']} ({year_counts[0]['count']:,} records)")
         
-        print(f"\n🎯 KEY INSIGHTS:")
-        print(f"   • Dataset spans 11 years of business performance")
-        print(f"   • Comprehensive financial metrics available for analysis")
-        print(f"   • Ready for advanced business intelligence and ML applications")
+        self._p(f"\n🎯 KEY INSIGHTS:")
+        self._p(f"   • Dataset spans 11 years of business performance")
+        self._p(f"   • Comprehensive financial metrics available for analysis")
+        self._p(f"   • Ready for advanced business intelligence and ML applications")
         
-        print("="*80)
+        self._p("="*80)
     
     def run_all_analytics(self):
         """Run all analytics types"""
         start_time = time.time()
         
-        print("🚀 STARTING COMPREHENSIVE BUSINESS ANALYTICS")
-        print("="*80)
+        # Everything this run prints is buffered and written out once at the end
+        self._local.out = self._out
+        
+        self._p("🚀 STARTING COMPREHENSIVE BUSINESS ANALYTICS")
+        self._p("="*80)
         
         try:
-            # Run all analytics
-            financial = self.financial_performance()
-            growth = self.growth_analysis()
-            segmentation = self.market_segmentation()
-            benchmarks = self.performance_benchmarks()
-            statistics = self.statistical_analysis()
+            # Run the independent analyses concurrently; each one's output is
+            # captured and printed in the usual order once all have finished
+            sections = {
+                'financial_performance': self.financial_performance,
+                'growth_analysis': self.growth_analysis,
+                'market_segmentation': self.market_segmentation,
+                'performance_benchmarks': self.performance_benchmarks,
+                'statistical_analysis': self.statistical_analysis
+            }
+            cache_path = self._cache_path()
+            cached = self._load_cached_run(cache_path)
+            if cached is not None:
+                results = cached['sections']
+                self._cached = cached['totals']
+                self._cache_fresh = True
+                self._p(f"♻️  Using cached results from {cache_path}")
+            else:
+                results = {}
+                with ThreadPoolExecutor(max_workers=len(sections)) as executor:
+                    futures = {executor.submit(self._capture, method): name
+                               for name, method in sections.items()}
+                    for future in as_completed(futures):
+                        results[futures[future]] = future.result()
+                
+                self._save_cached_run(cache_path, results)
+            
+            for name in sections:
+                self._out.write(results[name][0])
             
             # Generate summary
             self.executive_summary()
             
             # Combine all results
             all_analytics = {
-                'financial_performance': financial,
-                'growth_analysis': growth,
-                'market_segmentation': segmentation,
-                'performance_benchmarks': benchmarks,
-                'statistical_analysis': statistics,
+                **{name: results[name][1] for name in sections},
                 'generated_at': datetime.now().isoformat()
             }
             
             # Save results to file
-            with open('business_analytics_results.json', 'w') as f:
-                json.dump(all_analytics, f, indent=2, default=str)
+            if orjson is not None:
+                with open('business_analytics_results.json', 'wb') as f:
+                    f.write(orjson.dumps(
+                        all_analytics,
+                        default=str,
+                        option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                    ))
+            else:
+                with open('business_analytics_results.json', 'w') as f:
+                    json.dump(all_analytics, f, indent=2, default=str)
             
             end_time = time.time()
             
-            print(f"\n✅ ANALYTICS COMPLETE!")
-            print(f"⏱️  Total Time: {end_time - start_time:.1f} seconds")
-            print(f"📁 Results saved to: business_analytics_results.json")
-            print(f"🔍 Ready for business insights and decision-making!")
+            self._p(f"\n✅ ANALYTICS COMPLETE!")
+            self._p(f"⏱️  Total Time: {end_time - start_time:.1f} seconds")
+            self._p(f"📁 Results saved to: business_analytics_results.json")
+            self._p(f"🔍 Ready for business insights and decision-making!")
             
             return all_analytics
             
         except Exception as e:
-            print(f"❌ Analytics Error: {e}")
+            self._p(f"❌ Analytics Error: {e}")
             return None
         
         finally:
-            self.client.close()
+            self._local.out = None
+            sys.stdout.write(self._out.getvalue())
+            self._out = io.StringIO()
 
 if __name__ == "__main__":
     # Load configuration
@@ -443,3 +859,4 @@ if __name__ == "__main__":
     # Run complete analytics
     analytics_suite = SimpleBusinessAnalytics(connection_string)
     results = analytics_suite.run_all_analytics()
+    analytics_suite.close()